@@ -1,5 +1,7 @@
 """Main application entry point for Shortcuts MCP server."""
 
+import logging
+
 from .server import BaseMCPServer
 from .tools.recipe import RecipeTool
 from .tools.shortcuts import ShortcutsTool
@@ -8,6 +10,8 @@ from .tools.calendar_tool import CalendarTool
 from .tools.grocery import GroceryTool
 # from .tools.example import ExampleTool
 
+logger = logging.getLogger(__name__)
+
 
 class ShortcutsMCPServer(BaseMCPServer):
     """Main MCP server for Shortcuts integration."""
@@ -19,12 +23,17 @@ class ShortcutsMCPServer(BaseMCPServer):
 
     def _register_tools(self):
         """Register all available tools."""
-        # Register recipe tool
-        recipe_tool = RecipeTool()
-        self.register_tool(recipe_tool)
-
-        # Register shortcuts tool
-        shortcuts_tool = ShortcutsTool()
+        # Register recipe tool; the other tools still work without a Gemini key
+        try:
+            recipe_tool = RecipeTool()
+        except RuntimeError as e:
+            logger.error("Recipe tools disabled: %s", e)
+            recipe_tool = None
+        else:
+            self.register_tool(recipe_tool)
+
+        # Register shortcuts tool, sharing the recipe tool for add_recipe_to_list
+        shortcuts_tool = ShortcutsTool(recipe_tool)
         self.register_tool(shortcuts_tool)
 
         # Register notes tool
@@ -0,0 +1,87 @@
+"""Circuit breaker for calls to flaky external services."""
+
+import functools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is attempted while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a service for `reset_timeout` seconds once it has failed
+    `fail_max` times in a row.
+
+    Used as a decorator on async methods: while the circuit is open, or when
+    the wrapped call raises, the wrapper returns None instead of raising.
+    After the timeout the circuit is half-open: the next call is let through
+    as a trial while every other call is still short-circuited. A successful
+    trial closes the circuit again and a failed one re-opens it.
+    """
+
+    def __init__(self, name: str, fail_max: int = 3, reset_timeout: float = 60.0):
+        """Initialize a closed circuit breaker."""
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being short-circuited."""
+        if self._opened_at is None:
+            return False
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return True
+        # Half-open: only the single trial call may proceed
+        return self._trial_in_flight
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls are currently being short-circuited."""
+        if self.is_open:
+            raise CircuitOpenError(f"{self.name} circuit open")
+
+    def _admit(self) -> None:
+        """Check the circuit, claiming the trial call if it is half-open."""
+        self.check()
+        if self._opened_at is not None:
+            self._trial_in_flight = True
+
+    def _record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.fail_max or self._trial_in_flight:
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def __call__(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                self._admit()
+                result = await func(*args, **kwargs)
+            except CircuitOpenError as e:
+                logger.warning("%s, skipping request", e)
+                return None
+            except Exception:
+                self._record_failure()
+                return None
+            except BaseException:
+                # A cancelled trial proves nothing; let the next call try instead
+                self._trial_in_flight = False
+                raise
+
+            self._record_success()
+            return result
+        return wrapper
@@ -0,0 +1,40 @@
+"""Persistent on-disk cache shared by the Shortcuts MCP tools."""
+
+import functools
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from diskcache import Cache
+
+CACHE_DIR = os.path.expanduser("~/.cache/shortcuts_mcp")
+
+
+@functools.cache
+def get_cache() -> Cache:
+    """Return the process-wide disk cache, opening it on first use."""
+    return Cache(CACHE_DIR)
+
+
+def cached(namespace: str, ttl: float) -> Callable:
+    """
+    Memoize an async method's result on disk, keyed by its first argument.
+
+    Keys take the form "<namespace>:<normalized term>". None results are
+    not stored so that failed lookups are retried on the next call.
+    """
+    def decorator(func: Callable[..., Awaitable[Optional[Any]]]) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(self, term: str, *args, **kwargs):
+            key = f"{namespace}:{term.lower().strip()}"
+            cache = get_cache()
+
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+            result = await func(self, term, *args, **kwargs)
+            if result is not None:
+                cache.set(key, result, expire=ttl)
+            return result
+        return wrapper
+    return decorator
@@ -1,5 +1,6 @@
-"""Pydantic models for the Shortcuts MCP server."""
+"""Models for the Shortcuts MCP server."""
 
+from dataclasses import dataclass, field
 from pydantic import BaseModel
 from typing import Optional, List
 
@@ -10,37 +11,48 @@ class Ingredients(BaseModel):
     quantity: str
 
 
-class ToolResult(BaseModel):
+@dataclass(slots=True)
+class ToolResult:
     """Standard result model for tool operations."""
     status: str
     message: str = ""
-    data: dict = {}
+    data: dict = field(default_factory=dict)
 
 
-class StoreProduct(BaseModel):
+@dataclass(slots=True)
+class StoreProduct:
     """Model for a product from a grocery store."""
     description: str
     price: float
     unit: Optional[str] = None
     is_weighted: Optional[bool] = False
+    calculated_for: Optional[str] = None
+    original_per_kg_price: Optional[float] = None
+    note: Optional[str] = None
 
 
-class ItemComparison(BaseModel):
+@dataclass(slots=True)
+class ItemComparison:
     """Model for comparing a single item across stores."""
     item: str
+    item_name: str
+    requested_amount: Optional[str] = None
     coles: Optional[StoreProduct] = None
     woolworths: Optional[StoreProduct] = None
 
 
-class PriceComparisonSummary(BaseModel):
+@dataclass(slots=True)
+class PriceComparisonSummary:
     """Model for price comparison summary."""
     coles_total: float
     woolworths_total: float
     cheaper_store: Optional[str] = None
-    savings: float
+    savings: float = 0
+    unavailable_stores: List[str] = field(default_factory=list)
 
 
-class PriceComparisonResult(BaseModel):
+@dataclass(slots=True)
+class PriceComparisonResult:
     """Model for complete price comparison results."""
     status: str
     items_compared: int
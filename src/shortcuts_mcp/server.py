@@ -1,12 +1,46 @@
 """Base MCP Server class for organizing tools."""
 
+import atexit
+import logging
 import os
+import queue
 from abc import ABC, abstractmethod
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, List
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
 
+class _PassThroughQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records untouched. The stock prepare() formats
+    the message on the calling thread and clears exc_info, which would lose
+    the Rich traceback rendering; the queue never leaves this process, so the
+    record does not need to be made picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _configure_logging() -> None:
+    """
+    Hand log records to a background thread so formatting and writing them
+    never blocks a tool call. The root logger's existing handlers (installed
+    by FastMCP) are moved behind a QueueListener.
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, QueueHandler) for h in root.handlers):
+        return
+
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [_PassThroughQueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+
+
 class BaseMCPServer:
     """Base class for MCP server with tool management."""
 
@@ -14,6 +48,7 @@ class BaseMCPServer:
         """Initialize the MCP server."""
         load_dotenv()
         self.mcp = FastMCP(name)
+        _configure_logging()
         self.tools: List[BaseTool] = []
 
     def register_tool(self, tool: 'BaseTool') -> None:
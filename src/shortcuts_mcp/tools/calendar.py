@@ -1,10 +1,14 @@
 """Notes creation tool using MacOS Shortcuts."""
 
-import subprocess
+import asyncio
+import logging
 from typing import Dict, Any
 from mcp.server.fastmcp import FastMCP
 
 from ..server import BaseTool
+from ..worker import get_shortcuts_worker
+
+logger = logging.getLogger(__name__)
 
 
 class CalendarTool(BaseTool):
@@ -14,7 +18,7 @@ class CalendarTool(BaseTool):
         """Register calendar methods with MCP server."""
         mcp.tool()(self.create_event)
 
-    def create_event(self, title: str, start: str, end: str) -> Dict[str, Any]:
+    async def create_event(self, title: str, start: str, end: str) -> Dict[str, Any]:
         """
         Tool to add a calendar event.
         :param title: string; title of the event
@@ -22,21 +26,22 @@ class CalendarTool(BaseTool):
         :param end: string; end date and time of the event (ex. "31/05/2025 15:30")
         :return: Status
         """
-        shortcut_command = f'shortcuts run "Add New Event" <<< "{title}, {start}, {end}"'
+        shortcut_input = f"{title}, {start}, {end}"
 
         try:
-            process = subprocess.run(
-                shortcut_command, shell=True, capture_output=True, text=True)
+            # The worker blocks until the shortcut finishes, so keep it off the event loop
+            process = await asyncio.to_thread(
+                get_shortcuts_worker().run, "Add New Event", shortcut_input)
 
             if process.returncode != 0:
                 error_msg = f"Failed to run shortcut: {process.stderr}"
-                print(f"Error executing shortcut: {process.stderr}")
+                logger.error("Error executing shortcut: %s", process.stderr)
                 return {"status": "failed", "message": error_msg}
 
-            print(f"Successfully created event.")
+            logger.info("Successfully created event.")
             return {"status": "success"}
 
         except Exception as e:
             error_msg = f"Server error: {str(e)}"
-            print(f"An error occurred: {e}")
+            logger.error("An error occurred: %s", e)
             return {"status": "failed", "message": error_msg}
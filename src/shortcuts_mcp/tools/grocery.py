@@ -1,15 +1,59 @@
 """Grocery price comparison tool for Coles and Woolworths."""
 
-from functools import cache
-import requests
-import json
+import asyncio
+import httpx
+import ijson
+import logging
+import orjson
 import re
-import time
 import random
-from typing import Dict, Any, List, Optional, Tuple
+from contextlib import aclosing, asynccontextmanager
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
+from aiolimiter import AsyncLimiter
 from mcp.server.fastmcp import FastMCP
 
 from ..server import BaseTool
+from ..cache import cached, get_cache
+from ..breaker import CircuitBreaker, CircuitOpenError
+from ..models.schemas import (
+    ItemComparison,
+    PriceComparisonResult,
+    PriceComparisonSummary,
+    StoreProduct,
+    ToolResult,
+)
+
+logger = logging.getLogger(__name__)
+
+# How long store search results stay in the on-disk cache (6 hours)
+SEARCH_CACHE_TTL = 6 * 60 * 60
+# The Coles build ID only changes when Coles deploys (1 hour)
+BUILD_ID_CACHE_TTL = 60 * 60
+
+# Retry policy for HTTP 429 (Too Many Requests) responses
+MAX_RETRIES = 3
+# How often a Coles search waiting on the rate limiter re-checks the breaker
+LIMITER_POLL_SECONDS = 0.1
+
+# Per-store circuit breakers: after 3 consecutive failures, skip that store
+# for 60 seconds instead of waiting on a timeout for every item
+_coles_breaker = CircuitBreaker("Coles", fail_max=3, reset_timeout=60)
+_woolies_breaker = CircuitBreaker("Woolworths", fail_max=3, reset_timeout=60)
+
+# Weight patterns like "100g", "1kg", "1.5kg", "500g" at the end of an item
+_WEIGHT_RE = re.compile(r'^(.+?)\s+(\d+(?:\.\d+)?)\s*(g|kg)$', re.IGNORECASE)
+# Coles comparable price, e.g. "$11.50 per 1kg"
+_PER_KG_COLES_RE = re.compile(r'\$(\d+\.?\d*)\s*per\s*1?kg')
+# Woolworths cup price, e.g. "$11.50 / 1KG"
+_PER_KG_WOOLIES_RE = re.compile(r'\$(\d+\.?\d*)\s*/\s*1?kg', re.IGNORECASE)
+# Next.js page data embedded in the Coles homepage, matched against raw bytes
+_NEXT_DATA_OPEN = b'<script id="__NEXT_DATA__"'
+_NEXT_DATA_RE = re.compile(
+    rb'<script id="__NEXT_DATA__" type="application/json">([^<]+)</script>')
+_PRICE_RE = re.compile(r'\$(\d+\.?\d*)')
+
+# Optional keys added by the weight calculators that are passed through to StoreProduct
+_EXTRA_KEYS = frozenset(("calculated_for", "note", "original_per_kg_price"))
 
 
 class GroceryTool(BaseTool):
@@ -23,8 +67,19 @@ class GroceryTool(BaseTool):
                           "Chrome/113.0.0.0 Safari/537.36",
             "Accept": "application/json, text/javascript, */*; q=0.01",
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # One pooled HTTP/2 client reused for every store request
+        self.client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=10,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=20,
+                                max_connections=50),
+        )
+        self._coles_build_id: Optional[str] = None
+        self._coles_build_id_lock = asyncio.Lock()
+        # Allow one Coles search every 2 seconds; only blocks when exhausted
+        self._coles_limiter = AsyncLimiter(max_rate=1, time_period=2.0)
 
     def register_with_mcp(self, mcp: FastMCP) -> None:
         """Register grocery price comparison methods with MCP server."""
@@ -42,9 +97,7 @@ class GroceryTool(BaseTool):
 
         Returns: (item_name, weight_amount, weight_unit)
         """
-        # Regex to match weight patterns like "100g", "1kg", "1.5kg", "500g"
-        weight_pattern = r'^(.+?)\s+(\d+(?:\.\d+)?)\s*(g|kg)$'
-        match = re.match(weight_pattern, item_string.strip(), re.IGNORECASE)
+        match = _WEIGHT_RE.match(item_string.strip())
 
         if match:
             item_name = match.group(1).strip()
@@ -69,7 +122,7 @@ class GroceryTool(BaseTool):
 
         # Extract per-kg price from the unit string
         unit_str = product_data.get("unit", "")
-        per_kg_match = re.search(r'\$(\d+\.?\d*)\s*per\s*1?kg', unit_str)
+        per_kg_match = _PER_KG_COLES_RE.search(unit_str)
 
         if per_kg_match:
             per_kg_price = float(per_kg_match.group(1))
@@ -87,7 +140,7 @@ class GroceryTool(BaseTool):
 
             return {
                 **product_data,
-                "price": round(calculated_price, 2),
+                "price": calculated_price,
                 "calculated_for": f"{requested_weight}{requested_unit}",
                 "original_per_kg_price": per_kg_price
             }
@@ -106,8 +159,7 @@ class GroceryTool(BaseTool):
         unit_str = product_data.get("unit", "")
 
         # Look for per-kg pricing in Woolworths format like "$11.50 / 1KG"
-        per_kg_match = re.search(
-            r'\$(\d+\.?\d*)\s*/\s*1?kg', unit_str, re.IGNORECASE)
+        per_kg_match = _PER_KG_WOOLIES_RE.search(unit_str)
 
         if per_kg_match:
             per_kg_price = float(per_kg_match.group(1))
@@ -123,7 +175,7 @@ class GroceryTool(BaseTool):
 
             return {
                 **product_data,
-                "price": round(calculated_price, 2),
+                "price": calculated_price,
                 "calculated_for": f"{requested_weight}{requested_unit}",
                 "original_per_kg_price": per_kg_price
             }
@@ -134,77 +186,205 @@ class GroceryTool(BaseTool):
             "note": f"Could not calculate for {requested_weight}{requested_unit}, showing package price"
         }
 
-    @cache
-    def _get_coles_build_id(self) -> str:
+    async def _get_coles_build_id(self) -> str:
         """Get the build ID required for Coles API calls."""
-        resp = self.session.get(
-            "https://www.coles.com.au/", headers=self.headers)
-        resp.raise_for_status()
-        html = resp.text
-
-        m = re.search(
-            r'<script id="__NEXT_DATA__" type="application/json">([^<]+)</script>',
-            html,
-        )
+        if self._coles_build_id:
+            return self._coles_build_id
+
+        # Concurrent Coles searches share a single lookup
+        async with self._coles_build_id_lock:
+            if not self._coles_build_id:
+                self._coles_build_id = await self._fetch_coles_build_id()
+        return self._coles_build_id
+
+    def _invalidate_coles_build_id(self, build_id: str) -> None:
+        """Forget a build ID that Coles no longer serves, in memory and on disk."""
+        # Concurrent searches may all see the 404; only drop the stale ID once
+        if self._coles_build_id == build_id:
+            self._coles_build_id = None
+        cache = get_cache()
+        if cache.get("coles_build_id") == build_id:
+            cache.delete("coles_build_id")
+        # A 304 for the homepage would only hand the stale ID back
+        validators = cache.get("coles_homepage_validators")
+        if validators and validators.get("build_id") == build_id:
+            cache.delete("coles_homepage_validators")
+
+    async def _fetch_coles_build_id(self) -> str:
+        """Load the Coles build ID from the disk cache or scrape it from the homepage."""
+        # Reuse the build ID fetched by a previous server process if still fresh
+        cache = get_cache()
+        build_id = cache.get("coles_build_id")
+        if build_id:
+            return build_id
+
+        # Revalidate the last scraped build ID so an unchanged homepage is a 304
+        validators = cache.get("coles_homepage_validators")
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        # Stream the homepage and stop as soon as the __NEXT_DATA__ script is
+        # complete, only buffering from the opening tag onwards
+        buf = bytearray()
+        m = None
+        async with self.client.stream("GET", "https://www.coles.com.au/", headers=headers) as resp:
+            if resp.status_code == 304 and validators:
+                build_id = validators["build_id"]
+                cache.set("coles_build_id", build_id, expire=BUILD_ID_CACHE_TTL)
+                return build_id
+
+            resp.raise_for_status()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            async for chunk in resp.aiter_bytes(chunk_size=16384):
+                buf += chunk
+                if not buf.startswith(_NEXT_DATA_OPEN):
+                    start = buf.find(_NEXT_DATA_OPEN)
+                    if start < 0:
+                        # Keep just enough to catch a tag split across chunks
+                        del buf[:-len(_NEXT_DATA_OPEN)]
+                        continue
+                    del buf[:start]
+
+                m = _NEXT_DATA_RE.match(buf)
+                if m:
+                    break
+
         if not m:
             raise RuntimeError("Could not locate __NEXT_DATA__ in Coles HTML")
 
-        payload = json.loads(m.group(1))
+        payload = orjson.loads(m.group(1))
         build_id = payload.get("buildId")
         if not build_id:
             raise RuntimeError("buildId not found in __NEXT_DATA__")
+        cache.set("coles_build_id", build_id, expire=BUILD_ID_CACHE_TTL)
+        if etag or last_modified:
+            cache.set("coles_homepage_validators", {
+                "etag": etag,
+                "last_modified": last_modified,
+                "build_id": build_id,
+            })
         return build_id
 
-    def _search_coles(self, term: str, build_id: str) -> Optional[Dict[str, Any]]:
-        """Search for a product on Coles."""
+    @asynccontextmanager
+    async def _stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Stream a GET response, backing off and retrying when rate limited (HTTP 429).
+        The body is not read up front, so callers can stop consuming it early.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.client.stream("GET", url, **kwargs) as r:
+                if r.status_code != 429 or attempt == MAX_RETRIES:
+                    yield r
+                    return
+
+                backoff = 2 ** attempt + random.random()
+                try:
+                    retry_after = float(r.headers.get("Retry-After", backoff))
+                except ValueError:
+                    retry_after = backoff
+            await asyncio.sleep(min(retry_after, backoff))
+
+    async def _iter_json_items(self, response: httpx.Response,
+                               prefix: str) -> AsyncIterator[Any]:
+        """
+        Incrementally yield the JSON objects found at `prefix` (ijson syntax)
+        as the response body arrives, without materializing the whole document.
+        """
+        found = ijson.sendable_list()
+        parser = ijson.items_coro(found, prefix, use_float=True)
+        async for chunk in response.aiter_bytes():
+            parser.send(chunk)
+            for obj in found:
+                yield obj
+            del found[:]
+        parser.close()
+        for obj in found:
+            yield obj
+
+    @cached("coles", ttl=SEARCH_CACHE_TTL)
+    async def _search_coles(self, term: str) -> Optional[Dict[str, Any]]:
+        """Search for a product on Coles once the rate limiter allows it."""
+        # Wait for a slot before the breaker admits the call, so searches queued
+        # behind the limiter give up as soon as another search opens the circuit
+        while not self._coles_limiter.has_capacity():
+            try:
+                _coles_breaker.check()
+            except CircuitOpenError as e:
+                logger.warning("%s, skipping request", e)
+                return None
+            await asyncio.sleep(LIMITER_POLL_SECONDS)
+        # Capacity is free, so this returns without waiting
+        await self._coles_limiter.acquire()
+        return await self._fetch_coles(term)
+
+    @_coles_breaker
+    async def _fetch_coles(self, term: str) -> Optional[Dict[str, Any]]:
+        """Fetch the first usable Coles product for a search term."""
         try:
-            delay = round(random.uniform(1.5, 3.5), 2)
-            time.sleep(delay)
-
-            url = f"https://www.coles.com.au/_next/data/{build_id}/en/search/products.json?q={term}"
-            r = self.session.get(url, headers=self.headers)
-            r.raise_for_status()
-            data = r.json()
-
-            results = data.get("pageProps", {}).get(
-                "searchResults", {}).get("results", [])
-            for item in results:
-                if item.get("_type") == "PRODUCT":
-                    desc = item.get("description", "<no description>")
-                    pricing = item.get("pricing", {})
-
-                    unit_info = pricing.get("unit", {})
-                    is_weighted = unit_info.get("isWeighted", False)
-
-                    # Use comparable price only for truly weighted items
-                    comparable = pricing.get("comparable")
-                    if comparable and is_weighted:
-                        price_match = re.search(r'\$(\d+\.?\d*)', comparable)
-                        if price_match:
-                            price = float(price_match.group(1))
-                            return {
-                                "description": desc,
-                                "price": price,
-                                "unit": comparable,
-                                "is_weighted": True
-                            }
-
-                    # Use regular "now" price for pre-packaged items or as fallback
-                    price = pricing.get("now")
-                    if price is not None:
-                        unit_display = comparable if comparable else ""
+            for attempt in range(2):
+                build_id = await self._get_coles_build_id()
+                url = f"https://www.coles.com.au/_next/data/{build_id}/en/search/products.json"
+                async with self._stream(url, params={"q": term}) as r:
+                    # Coles has deployed since the build ID was cached; look it up again
+                    if r.status_code == 404 and attempt == 0:
+                        self._invalidate_coles_build_id(build_id)
+                        continue
+                    r.raise_for_status()
+                    return await self._first_coles_product(r)
+        except Exception as e:
+            logger.error("Error searching Coles for '%s': %s", term, e)
+            raise
+
+    async def _first_coles_product(self, response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """Return the first usable product in a Coles search response."""
+        results = self._iter_json_items(
+            response, "pageProps.searchResults.results.item")
+
+        # Stop reading the response at the first usable product
+        async with aclosing(results):
+            async for item in results:
+                if item.get("_type") != "PRODUCT":
+                    continue
+
+                desc = item.get("description", "<no description>")
+                pricing = item.get("pricing", {})
+
+                unit_info = pricing.get("unit", {})
+                is_weighted = unit_info.get("isWeighted", False)
+
+                # Use comparable price only for truly weighted items
+                comparable = pricing.get("comparable")
+                if comparable and is_weighted:
+                    price_match = _PRICE_RE.search(comparable)
+                    if price_match:
+                        price = float(price_match.group(1))
                         return {
                             "description": desc,
                             "price": price,
-                            "unit": unit_display,
-                            "is_weighted": is_weighted
+                            "unit": comparable,
+                            "is_weighted": True
                         }
-            return None
-        except Exception as e:
-            print(f"Error searching Coles for '{term}': {e}")
-            return None
 
-    def _search_woolworths(self, term: str) -> Optional[Dict[str, Any]]:
+                # Use regular "now" price for pre-packaged items or as fallback
+                price = pricing.get("now")
+                if price is not None:
+                    unit_display = comparable if comparable else ""
+                    return {
+                        "description": desc,
+                        "price": price,
+                        "unit": unit_display,
+                        "is_weighted": is_weighted
+                    }
+        return None
+
+    @cached("woolworths", ttl=SEARCH_CACHE_TTL)
+    @_woolies_breaker
+    async def _search_woolworths(self, term: str) -> Optional[Dict[str, Any]]:
         """Search for a product on Woolworths."""
         try:
             url = "https://www.woolworths.com.au/apis/ui/Search/products"
@@ -213,24 +393,29 @@ class GroceryTool(BaseTool):
                 "User-Agent": self.headers["User-Agent"],
                 "Accept": "application/json, text/plain, */*",
             }
-            r = requests.get(url, headers=headers, params=params)
-            r.raise_for_status()
-            data = r.json()
-
-            for section in data.get("Products", []):
-                for product in section.get("Products", []):
-                    name = product.get("Name") or product.get(
-                        "DisplayName", "Unknown")
-                    price = product.get("Price")
-                    unit = product.get("CupString", "")
-                    if name and price is not None:
-                        return {"description": name, "price": price, "unit": unit}
-            return None
+            async with self._stream(url, headers=headers, params=params) as r:
+                r.raise_for_status()
+                products = self._iter_json_items(
+                    r, "Products.item.Products.item")
+
+                # Stop reading the response at the first usable product
+                async with aclosing(products):
+                    product = await anext((
+                        p async for p in products
+                        if p.get("Price") is not None
+                        and (p.get("Name") or p.get("DisplayName", "Unknown"))
+                    ), None)
+
+            if product is None:
+                return None
+            name = product.get("Name") or product.get("DisplayName", "Unknown")
+            return {"description": name, "price": product["Price"],
+                    "unit": product.get("CupString", "")}
         except Exception as e:
-            print(f"Error searching Woolworths for '{term}': {e}")
-            return None
+            logger.error("Error searching Woolworths for '%s': %s", term, e)
+            raise
 
-    def compare_grocery_prices(self, items: List[str]) -> Dict[str, Any]:
+    async def compare_grocery_prices(self, items: List[str]) -> Union[PriceComparisonResult, ToolResult]:
         """
         Compare grocery prices between Coles and Woolworths for a list of items.
         Items can include weights: ["garlic 100g", "carrots 1kg", "milk 3L", "bread"]
@@ -239,30 +424,39 @@ class GroceryTool(BaseTool):
         :return: Detailed price comparison results
         """
         try:
-            build_id = self._get_coles_build_id()
-            coles_total = 0
-            woolies_total = 0
+            # Totals are kept in integer cents to avoid float drift over long lists
+            coles_total_cents = 0
+            woolies_total_cents = 0
             comparison_results = []
 
-            for item in items:
-                # Parse item to separate name and weight
-                item_name, requested_weight, weight_unit = self._parse_item_with_weight(
-                    item)
+            # Parse items to separate name and weight
+            parsed_items = [self._parse_item_with_weight(item) for item in items]
 
-                print(f"🔍 Searching for: {item_name}" +
-                      (f" (calculating for {requested_weight}{weight_unit})" if requested_weight else ""))
+            for item_name, requested_weight, weight_unit in parsed_items:
+                logger.info("🔍 Searching for: %s%s", item_name,
+                            f" (calculating for {requested_weight}{weight_unit})" if requested_weight else "")
 
-                coles_result = self._search_coles(item_name, build_id)
-                woolies_result = self._search_woolworths(item_name)
+            # Search each distinct term once, even if it appears in several items
+            unique_terms = list(dict.fromkeys(
+                item_name.lower() for item_name, _, _ in parsed_items))
+
+            # Query both stores for every term concurrently. Woolworths requests
+            # don't wait on the Coles build ID, and cached terms never fetch it.
+            search_results = dict(zip(unique_terms, await asyncio.gather(*(
+                asyncio.gather(self._search_coles(term),
+                               self._search_woolworths(term))
+                for term in unique_terms
+            ))))
+
+            for item, (item_name, requested_weight, weight_unit) in zip(items, parsed_items):
+                coles_result, woolies_result = search_results[item_name.lower()]
 
                 # Process results
-                item_comparison = {
-                    "item": item,
-                    "item_name": item_name,
-                    "requested_amount": f"{requested_weight}{weight_unit}" if requested_weight else None,
-                    "coles": None,
-                    "woolworths": None
-                }
+                item_comparison = ItemComparison(
+                    item=item,
+                    item_name=item_name,
+                    requested_amount=f"{requested_weight}{weight_unit}" if requested_weight else None,
+                )
 
                 if coles_result:
                     # Calculate price based on requested weight if specified
@@ -272,15 +466,15 @@ class GroceryTool(BaseTool):
                     else:
                         coles_processed = coles_result
 
-                    item_comparison["coles"] = {
-                        "description": coles_processed["description"],
-                        "price": coles_processed["price"],
-                        "unit": coles_processed.get("unit", ""),
-                        "is_weighted": coles_processed.get("is_weighted", False),
-                        **{k: v for k, v in coles_processed.items()
-                           if k in ["calculated_for", "note", "original_per_kg_price"]}
-                    }
-                    coles_total += coles_processed["price"]
+                    coles_cents = round(coles_processed["price"] * 100)
+                    item_comparison.coles = StoreProduct(
+                        description=coles_processed["description"],
+                        price=coles_cents / 100,
+                        unit=coles_processed.get("unit", ""),
+                        is_weighted=coles_processed.get("is_weighted", False),
+                        **{k: coles_processed[k] for k in _EXTRA_KEYS & coles_processed.keys()}
+                    )
+                    coles_total_cents += coles_cents
 
                 if woolies_result:
                     # Calculate price based on requested weight if specified
@@ -290,39 +484,39 @@ class GroceryTool(BaseTool):
                     else:
                         woolies_processed = woolies_result
 
-                    item_comparison["woolworths"] = {
-                        "description": woolies_processed["description"],
-                        "price": woolies_processed["price"],
-                        "unit": woolies_processed.get("unit", ""),
-                        **{k: v for k, v in woolies_processed.items()
-                           if k in ["calculated_for", "note", "original_per_kg_price"]}
-                    }
-                    woolies_total += woolies_processed["price"]
+                    woolies_cents = round(woolies_processed["price"] * 100)
+                    item_comparison.woolworths = StoreProduct(
+                        description=woolies_processed["description"],
+                        price=woolies_cents / 100,
+                        unit=woolies_processed.get("unit", ""),
+                        **{k: woolies_processed[k] for k in _EXTRA_KEYS & woolies_processed.keys()}
+                    )
+                    woolies_total_cents += woolies_cents
 
                 comparison_results.append(item_comparison)
 
             # Calculate summary
-            summary = {
-                "coles_total": round(coles_total, 2),
-                "woolworths_total": round(woolies_total, 2),
-                "cheaper_store": None,
-                "savings": 0
-            }
-
-            if coles_total > 0 and woolies_total > 0:
-                difference = abs(coles_total - woolies_total)
-                summary["cheaper_store"] = "Coles" if coles_total < woolies_total else "Woolworths"
-                summary["savings"] = round(difference, 2)
-
-            return {
-                "status": "success",
-                "items_compared": len(items),
-                "results": comparison_results,
-                "summary": summary
-            }
+            summary = PriceComparisonSummary(
+                coles_total=coles_total_cents / 100,
+                woolworths_total=woolies_total_cents / 100,
+                unavailable_stores=[breaker.name for breaker in (_coles_breaker, _woolies_breaker)
+                                    if breaker.is_open]
+            )
+
+            if coles_total_cents > 0 and woolies_total_cents > 0:
+                difference_cents = abs(coles_total_cents - woolies_total_cents)
+                summary.cheaper_store = "Coles" if coles_total_cents < woolies_total_cents else "Woolworths"
+                summary.savings = difference_cents / 100
+
+            return PriceComparisonResult(
+                status="success",
+                items_compared=len(items),
+                results=comparison_results,
+                summary=summary
+            )
 
         except Exception as e:
-            return {
-                "status": "failed",
-                "message": f"Error comparing prices: {str(e)}"
-            }
+            return ToolResult(
+                status="failed",
+                message=f"Error comparing prices: {str(e)}"
+            )
@@ -1,10 +1,14 @@
 """Notes creation tool using MacOS Shortcuts."""
 
-import subprocess
+import asyncio
+import logging
 from typing import Dict, Any
 from mcp.server.fastmcp import FastMCP
 
 from ..server import BaseTool
+from ..worker import get_shortcuts_worker
+
+logger = logging.getLogger(__name__)
 
 
 class NotesTool(BaseTool):
@@ -14,27 +18,26 @@ class NotesTool(BaseTool):
         """Register notes methods with MCP server."""
         mcp.tool()(self.create_note)
 
-    def create_note(self, summary: str) -> Dict[str, Any]:
+    async def create_note(self, summary: str) -> Dict[str, Any]:
         """
         Tool to create a summary of the chat conversation using MacOS Shortcuts.
         :param summary: string; content of the summary
         :return: Status
         """
-        shortcut_command = f'shortcuts run "Claude Notes" <<< "{summary}"'
-
         try:
-            process = subprocess.run(
-                shortcut_command, shell=True, capture_output=True, text=True)
+            # The worker blocks until the shortcut finishes, so keep it off the event loop
+            process = await asyncio.to_thread(
+                get_shortcuts_worker().run, "Claude Notes", summary)
 
             if process.returncode != 0:
                 error_msg = f"Failed to run shortcut: {process.stderr}"
-                print(f"Error executing shortcut: {process.stderr}")
+                logger.error("Error executing shortcut: %s", process.stderr)
                 return {"status": "failed", "message": error_msg}
 
-            print(f"Successfully created note.")
+            logger.info("Successfully created note.")
             return {"status": "success"}
 
         except Exception as e:
             error_msg = f"Server error: {str(e)}"
-            print(f"An error occurred: {e}")
+            logger.error("An error occurred: %s", e)
             return {"status": "failed", "message": error_msg}
@@ -1,56 +1,387 @@
 """Recipe extraction tool using Gemini API."""
 
+import asyncio
+import hashlib
+import httpx
+import ijson
+import orjson
 import os
-from typing import Dict, Any
-from google import genai
-from google.genai import types
+import random
+import re
+from functools import cache
+from typing import Dict, Any, AsyncIterator, Callable, List, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from mcp.server.fastmcp import FastMCP
 
 from ..server import BaseTool
+from ..cache import get_cache
 from ..models.schemas import Ingredients
 
+GEMINI_MODEL = 'models/gemini-2.5-flash-preview-05-20'
+EXTRACT_PROMPT = 'Extract the ingredients and its quantities (by weight or just by number)'
+BATCH_EXTRACT_PROMPT = ('Extract the ingredients and its quantities (by weight or just by number) '
+                        'for EACH document, returning a list of ingredient lists in the same order')
+
+# How long extracted ingredients stay in the on-disk cache (10 days)
+RECIPE_CACHE_TTL = 10 * 24 * 60 * 60
+
+# At most this many Gemini requests are in flight at once
+MAX_CONCURRENT_REQUESTS = 10
+# Retries for rate-limited (429), failed (5xx) or timed-out Gemini requests
+MAX_RETRIES = 3
+
+_gemini_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Gemini's errors for a request over the model's input limit, e.g. "The input
+# token count (1200000) exceeds the maximum number of tokens allowed (1048576)"
+_TOO_LARGE_RE = re.compile(
+    r"input token count.*exceeds the maximum|request payload size exceeds the limit",
+    re.IGNORECASE)
+
+# Query parameters that only track where a link was shared from, on any site
+_TRACKING_PARAMS = frozenset(("fbclid", "gclid", "igshid", "mc_cid", "mc_eid"))
+
+# Hosts that all serve the same YouTube videos
+_YOUTUBE_HOSTS = frozenset(("youtube.com", "m.youtube.com", "music.youtube.com"))
+# YouTube share-sheet parameters; other sites may use these names to pick content
+_YOUTUBE_SHARE_PARAMS = frozenset(("si", "feature"))
+
+
+def _normalize_url(url: str) -> str:
+    """
+    Canonicalize a recipe URL so links that point at the same content share a
+    cache entry: lowercase scheme and host without "www.", no tracking
+    parameters (plus YouTube's share parameters on YouTube), fragment or
+    trailing slash, and sorted query parameters.
+    YouTube short links, Shorts and mobile URLs become youtube.com/watch?v=<id>
+    with any start time dropped.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/")
+    dropped = _TRACKING_PARAMS
+    if host in _YOUTUBE_HOSTS or host == "youtu.be":
+        dropped = _TRACKING_PARAMS | _YOUTUBE_SHARE_PARAMS
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k not in dropped and not k.startswith("utm_"))
+
+    video_id = None
+    if host == "youtu.be":
+        video_id = path.lstrip("/")
+    elif host in _YOUTUBE_HOSTS:
+        if path.startswith("/shorts/"):
+            video_id = path.removeprefix("/shorts/")
+        elif path == "/watch":
+            video_id = dict(query).get("v")
+    if video_id:
+        return f"https://youtube.com/watch?v={video_id}"
+
+    return urlunsplit((parts.scheme.lower(), host, path, urlencode(query), ""))
+
+
+def _recipe_cache_key(url: str) -> str:
+    """
+    Cache key for a recipe extraction, covering the model, both extraction
+    prompts and the URL. Single and batched extractions of a URL share the
+    entry; changing either prompt invalidates it.
+    """
+    digest = hashlib.sha256(
+        f"{GEMINI_MODEL}\n{EXTRACT_PROMPT}\n{BATCH_EXTRACT_PROMPT}\n"
+        f"{_normalize_url(url)}".encode()).hexdigest()
+    return f"recipe:{digest}"
+
+
+def _is_cacheable(url: str) -> bool:
+    """Only web URLs are cached; a local file can be edited under the same path."""
+    return urlsplit(url.strip()).scheme.lower() in ("http", "https")
+
+
+def format_for_shortcut(ingredients: List[Dict[str, Any]]) -> str:
+    """Format ingredients as the comma separated "name quantity" string the groceries shortcut expects."""
+    return ", ".join(f"{i['name']} {i['quantity']}" for i in ingredients)
+
+
+def _is_request_too_large(error: Exception) -> bool:
+    """Whether a Gemini error says the request exceeded the model's input limit."""
+    return getattr(error, "code", None) == 400 and bool(_TOO_LARGE_RE.search(str(error)))
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed Gemini request is worth retrying after a back-off."""
+    # The SDK's httpx transport raises its own timeouts and connection errors
+    if isinstance(error, (TimeoutError, httpx.TransportError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+
+@cache
+def _prompt_part(batched: bool):
+    """Return the shared prompt Part for single or batched extractions."""
+    from google.genai import types
+
+    return types.Part(text=BATCH_EXTRACT_PROMPT if batched else EXTRACT_PROMPT)
+
+
+@cache
+def _config(batched: bool):
+    """
+    Return the shared request config for single or batched extractions.
+
+    The response schema is compiled into a types.Schema once here; passing
+    list[Ingredients] instead makes the SDK build a placeholder pydantic model
+    and regenerate its JSON schema on every request.
+    """
+    from google.genai import types
+
+    schema = {"type": "array", "items": Ingredients.model_json_schema()}
+    if batched:
+        schema = {"type": "array", "items": schema}
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=types.Schema.model_validate(schema)
+    )
+
+
+def _contents(urls: List[str], batched: bool):
+    """Build the request contents: one file part per URL followed by the prompt."""
+    from google.genai import types
+
+    return types.Content(
+        parts=[
+            *(types.Part(file_data=types.FileData(file_uri=u)) for u in urls),
+            _prompt_part(batched)
+        ]
+    )
+
+
+async def _backoff(attempt: int) -> None:
+    """Wait before retrying a Gemini request: exponential back-off with jitter."""
+    await asyncio.sleep(2 ** attempt + random.random())
+
+
+async def _request(method: Callable, **kwargs) -> Any:
+    """
+    Call a Gemini client method under the concurrency cap, retrying
+    rate-limited and transient failures with exponential back-off.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with _gemini_semaphore:
+                return await method(**kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not _is_retryable(e):
+                raise
+        # Back off outside the semaphore so other requests can proceed
+        await _backoff(attempt)
+
+
+async def _request_stream(method: Callable, **kwargs) -> AsyncIterator[Any]:
+    """
+    Stream a Gemini response with the same concurrency cap and retries as
+    _request. The SDK only sends the request once the stream is iterated, so
+    both cover everything up to the first chunk; later chunks are passed on
+    as they arrive.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with _gemini_semaphore:
+                stream = await method(**kwargs)
+                first = await anext(stream, None)
+            break
+        except Exception as e:
+            if attempt == MAX_RETRIES or not _is_retryable(e):
+                raise
+        await _backoff(attempt)
+
+    if first is None:
+        return
+    yield first
+    async for chunk in stream:
+        yield chunk
+
+
+@cache
+def _get_client(api_key: str):
+    """Return a Gemini client shared by every call using this API key."""
+    # Imported on first use: google-genai takes about as long to load as
+    # the rest of the server combined and only this tool needs it
+    from google import genai
+    from google.genai import types
+
+    # The SDK keeps one async httpx client per genai.Client; let it multiplex
+    # concurrent requests over HTTP/2 and keep idle connections alive
+    return genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(async_client_args={
+            "http2": True,
+            "limits": httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        }),
+    )
+
 
 class RecipeTool(BaseTool):
     """Tool for extracting recipes using Gemini API."""
 
     def __init__(self):
-        """Initialize the recipe tool."""
+        """
+        Initialize the recipe tool.
+
+        Raises RuntimeError if GEMINI_API_KEY is not set, so a missing key is
+        reported at startup rather than on every request.
+        """
         self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise RuntimeError("GEMINI_API_KEY environment variable not set")
 
     def register_with_mcp(self, mcp: FastMCP) -> None:
         """Register recipe methods with MCP server."""
         mcp.tool()(self.get_recipe)
+        mcp.tool()(self.get_recipe_as_shortcut_string)
 
-    async def get_recipe(self, url: str) -> str:
+    async def get_recipe(self, url: Union[str, List[str]]) -> Union[Dict[str, Any], str]:
         """
         Use this resource to send the URL provided by the user to the Gemini API
+        :param url: URL or file path to the recipe, or a list of them to extract together in one request
+        :return: {"ingredients": [...]} for one URL, or {"recipes": [{"url": ..., "ingredients": [...]}, ...]} in order for a list of URLs; an error message on failure
+        """
+        try:
+            urls = [url] if isinstance(url, str) else list(url)
+            results = await self._get_ingredient_texts(urls)
+
+            # Parsed once here and wrapped in one object, which MCP sends as a
+            # single JSON document (bare lists would be split into one block per item)
+            if isinstance(url, str):
+                return {"ingredients": orjson.loads(results[url])}
+            return {"recipes": [{"url": u, "ingredients": orjson.loads(results[u])}
+                                for u in urls]}
+
+        except Exception as e:
+            return f"Error processing recipe: {str(e)}"
+
+    async def get_recipe_as_shortcut_string(self, url: str) -> str:
+        """
+        Extract the ingredients from a recipe URL and return them already formatted for create_list(), i.e. "item 1 500g, item 2 2x". Use this instead of get_recipe() when the ingredients are only going to be added to the groceries list.
         :param url: URL or file path to the recipe
-        :return: JSON string of ingredients list
+        :return: Comma separated string of ingredients and quantities
         """
         try:
-            if not self.api_key:
-                return "Error: GEMINI_API_KEY environment variable not set"
-
-            client = genai.Client(api_key=self.api_key)
-
-            response = client.models.generate_content(
-                model='models/gemini-2.5-flash-preview-05-20',
-                contents=types.Content(
-                    parts=[
-                        types.Part(
-                            file_data=types.FileData(file_uri=url)
-                        ),
-                        types.Part(
-                            text='Extract the ingredients and its quantities (by weight or just by number)')
-                    ]
-                ),
-                config={
-                    "response_mime_type": "application/json",
-                    "response_schema": list[Ingredients]
-                }
-            )
-
-            return response.text
+            return format_for_shortcut(await self.get_ingredients(url))
 
         except Exception as e:
             return f"Error processing recipe: {str(e)}"
+
+    async def get_ingredients(self, url: str) -> List[Dict[str, Any]]:
+        """
+        Return the ingredients for one recipe URL, for in-process callers.
+        Shares the cached, retried extraction path used by get_recipe.
+        """
+        results = await self._get_ingredient_texts([url])
+        return orjson.loads(results[url])
+
+    async def _get_ingredient_texts(self, urls: List[str]) -> Dict[str, str]:
+        """Return the ingredients JSON for each URL, from the cache where possible."""
+        # Repeat URLs are answered from the disk cache without calling Gemini
+        cache = get_cache()
+        results = {u: cache.get(_recipe_cache_key(u)) if _is_cacheable(u) else None
+                   for u in urls}
+        missing = [u for u in results if results[u] is None]
+        if missing:
+            results.update(await self._extract(missing))
+        return results
+
+    async def _extract(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Extract ingredients for the given URLs and cache them, returning a JSON
+        ingredients list per URL. If the batch is too large for a single
+        request it is split in half and each half retried.
+        """
+        try:
+            texts = await self._generate(urls)
+        except Exception as e:
+            if len(urls) == 1 or not _is_request_too_large(e):
+                raise
+            middle = len(urls) // 2
+            first, second = await asyncio.gather(
+                self._extract(urls[:middle]), self._extract(urls[middle:]))
+            return {**first, **second}
+
+        cache = get_cache()
+        for u, text in zip(urls, texts):
+            if _is_cacheable(u):
+                cache.set(_recipe_cache_key(u), text, expire=RECIPE_CACHE_TTL)
+        return dict(zip(urls, texts))
+
+    async def _generate(self, urls: List[str]) -> List[str]:
+        """Send one Gemini request covering every URL and split the response per URL."""
+        client = _get_client(self.api_key)
+        batched = len(urls) > 1
+
+        response = await _request(
+            client.aio.models.generate_content,
+            model=GEMINI_MODEL,
+            contents=_contents(urls, batched),
+            config=_config(batched)
+        )
+
+        if not response.text:
+            raise RuntimeError("Gemini returned an empty response")
+
+        # Parsing validates the JSON before it is cached; re-serializing compacts it
+        parsed = orjson.loads(response.text)
+        if not batched:
+            return [orjson.dumps(parsed).decode()]
+
+        if len(parsed) != len(urls):
+            raise RuntimeError(
+                f"Expected {len(urls)} ingredient lists, got {len(parsed)}")
+        return [orjson.dumps(ingredients).decode() for ingredients in parsed]
+
+    async def stream_ingredients(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the ingredients for one recipe URL as Gemini streams them out,
+        so in-process callers can start acting on the first ingredient before
+        the model has finished. Results are cached like get_recipe's.
+        """
+        cache = get_cache()
+        cacheable = _is_cacheable(url)
+        cached_text = cache.get(_recipe_cache_key(url)) if cacheable else None
+        if cached_text is not None:
+            for ingredient in orjson.loads(cached_text):
+                yield ingredient
+            return
+
+        client = _get_client(self.api_key)
+        stream = _request_stream(
+            client.aio.models.generate_content_stream,
+            model=GEMINI_MODEL,
+            contents=_contents([url], False),
+            config=_config(False)
+        )
+
+        # Parse the JSON array incrementally, emitting each element once complete
+        ingredients: List[Dict[str, Any]] = []
+        found = ijson.sendable_list()
+        parser = ijson.items_coro(found, "item")
+        received = False
+        async for chunk in stream:
+            if not chunk.text:
+                continue
+            received = True
+            parser.send(chunk.text.encode())
+            for ingredient in found:
+                ingredients.append(ingredient)
+                yield ingredient
+            del found[:]
+
+        if not received:
+            raise RuntimeError("Gemini returned an empty response")
+        # Closing the parser raises if the response was not a complete JSON array
+        parser.close()
+        for ingredient in found:
+            ingredients.append(ingredient)
+            yield ingredient
+
+        if cacheable:
+            cache.set(_recipe_cache_key(url), orjson.dumps(ingredients).decode(),
+                      expire=RECIPE_CACHE_TTL)
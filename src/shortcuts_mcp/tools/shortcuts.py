@@ -1,40 +1,120 @@
 """MacOS Shortcuts integration tool."""
 
-import subprocess
-from typing import Dict, Any
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
 
 from ..server import BaseTool
+from ..worker import get_shortcuts_worker
+from .recipe import RecipeTool, format_for_shortcut
+
+logger = logging.getLogger(__name__)
+
+# create_list calls arriving within this many seconds share one shortcut run
+DEBOUNCE_SECONDS = 0.1
 
 
 class ShortcutsTool(BaseTool):
     """Tool for integrating with MacOS Shortcuts."""
 
+    def __init__(self, recipe_tool: Optional[RecipeTool] = None):
+        """Initialize the shortcuts tool, optionally with a recipe tool to extract ingredients."""
+        self.recipe_tool = recipe_tool
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
     def register_with_mcp(self, mcp: FastMCP) -> None:
         """Register shortcuts methods with MCP server."""
         mcp.tool()(self.create_list)
+        if self.recipe_tool is not None:
+            mcp.tool()(self.add_recipe_to_list)
 
-    def create_list(self, items: str) -> Dict[str, Any]:
+    async def create_list(self, items: str) -> Dict[str, Any]:
         """
         Tool to create a list of recipes. Pass the ingredients extracted via the get_recipe() resource as a comma separated list i.e., "item 1 500g, item 2 2x". The MacOS Shortcut expects a comma separated string only.
         :param items: List of objects, each containing a name and quantity"
         :return: Status dictionary
         """
-        shortcut_command = f'shortcuts run "Add Items to Groceries List" <<< "{items}"'
+        # Nothing to add, so don't run the shortcut at all
+        items = items.strip()
+        if not items:
+            return {"status": "success", "ingredients_added": ""}
+
+        # Queue the items; the first call in a burst schedules a single flush
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((items, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
 
+        result = await future
+        if result["status"] != "success":
+            return result
+        return {"status": "success", "ingredients_added": items}
+
+    async def _flush(self) -> None:
+        """After the debounce window, add every queued item list with one shortcut run."""
+        await asyncio.sleep(DEBOUNCE_SECONDS)
+        batch, self._pending = self._pending, []
+        self._flush_task = None
+
+        result = await self._add_items(", ".join(items for items, _ in batch))
+        for _, future in batch:
+            if not future.done():
+                future.set_result(result)
+
+    async def _add_items(self, items: str) -> Dict[str, Any]:
+        """Run the groceries shortcut once with a comma separated list of items."""
         try:
-            process = subprocess.run(
-                shortcut_command, shell=True, capture_output=True, text=True)
+            # Run through the shared osascript worker (off the event loop) so the
+            # Shortcuts runtime isn't started from scratch for every list
+            process = await asyncio.to_thread(
+                get_shortcuts_worker().run, "Add Items to Groceries List", items)
 
             if process.returncode != 0:
                 error_msg = f"Failed to run shortcut: {process.stderr}"
-                print(f"Error executing shortcut: {process.stderr}")
+                logger.error("Error executing shortcut: %s", process.stderr)
                 return {"status": "failed", "message": error_msg}
 
-            print(f"Successfully added items to groceries list: {items}")
+            logger.info("Successfully added items to groceries list: %s", items)
             return {"status": "success", "ingredients_added": items}
 
         except Exception as e:
             error_msg = f"Server error: {str(e)}"
-            print(f"An error occurred: {e}")
+            logger.error("An error occurred: %s", e)
             return {"status": "failed", "message": error_msg}
+
+    async def add_recipe_to_list(self, url: str) -> Dict[str, Any]:
+        """
+        Tool to extract the ingredients from a recipe URL and add them straight to the groceries list in one step. Prefer this over calling get_recipe() and then create_list() when the user just wants the ingredients on their list.
+        :param url: URL or file path to the recipe
+        :return: Status dictionary
+        """
+        # Call the recipe tool in-process rather than via another MCP round trip,
+        # handing each ingredient to create_list as soon as Gemini emits it. The
+        # debounce groups ingredients that arrive together, so the groceries
+        # shortcut starts on the first ones while the rest are still streaming
+        entries: List[str] = []
+        additions: List[asyncio.Task] = []
+        error_msg = None
+        try:
+            async for ingredient in self.recipe_tool.stream_ingredients(url):
+                entry = format_for_shortcut([ingredient])
+                entries.append(entry)
+                additions.append(asyncio.create_task(self.create_list(entry)))
+        except Exception as e:
+            error_msg = f"Error processing recipe: {str(e)}"
+            logger.error("An error occurred: %s", e)
+
+        results = await asyncio.gather(*additions)
+        failed = next((r for r in results if r["status"] != "success"), None)
+        if failed is not None:
+            return failed
+        if error_msg is not None:
+            # Anything extracted before the failure is already on the list
+            return {"status": "failed", "message": error_msg,
+                    "ingredients_added": ", ".join(entries)}
+        if not entries:
+            return {"status": "failed", "message": "No ingredients found in recipe"}
+
+        return {"status": "success", "ingredients_added": ", ".join(entries)}
@@ -0,0 +1,158 @@
+"""Long-lived AppleScript worker for running MacOS Shortcuts."""
+
+import functools
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from typing import Optional
+
+# Most error text kept per job; callers only log or report it
+MAX_ERROR_CHARS = 4096
+# A shortcut still running after this many seconds is treated as hung
+JOB_TIMEOUT_SECONDS = 60.0
+
+
+def _applescript_string(value: str) -> str:
+    """Quote a Python string as a single-line AppleScript string literal."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    lines = escaped.splitlines() or [""]
+    return " & linefeed & ".join(f'"{line}"' for line in lines)
+
+
+def _pump_lines(process: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+    """Copy osascript's output into a queue line by line; None marks EOF."""
+    for line in process.stdout:
+        lines.put(line)
+    lines.put(None)
+
+
+class ShortcutsWorker:
+    """
+    Run shortcuts through one persistent `osascript -i` process.
+
+    Starting the `shortcuts` CLI costs a fork/exec plus Shortcuts runtime
+    startup on every call; an interactive osascript session pays that once
+    and is then sent one `run shortcut` statement per job.
+
+    osascript prints whatever each statement returns, including text from the
+    shortcut itself, so that output is never inspected. Instead each job is
+    wrapped in `try ... on error` and returns an explicit "<marker>:ok" or
+    "<marker>:err:<number>:<message>" sentinel, followed by a "<marker>:end"
+    statement that marks the end of the job's output on the shared pipe.
+    """
+
+    def __init__(self):
+        """Initialize the worker; the osascript process starts on first use."""
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _ensure_process(self) -> subprocess.Popen:
+        """Start osascript if it is not running (or has exited)."""
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["osascript", "-i"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+            # Output is read on a separate thread so a job can wait for it
+            # with a deadline; each process gets a fresh queue so lines from
+            # a killed one never reach the next job
+            self._lines = queue.Queue()
+            threading.Thread(target=_pump_lines, args=(self._process, self._lines),
+                             daemon=True).start()
+        return self._process
+
+    def _reset(self, process: subprocess.Popen) -> None:
+        """Kill osascript so the next job starts a fresh process."""
+        process.kill()
+        self._process = None
+
+    def run(self, shortcut: str, shortcut_input: str,
+            timeout: float = JOB_TIMEOUT_SECONDS) -> subprocess.CompletedProcess:
+        """
+        Run a shortcut with the given input and wait for it to finish.
+
+        Returns a CompletedProcess so callers can treat it like subprocess.run:
+        a non-zero returncode means the shortcut raised an error or did not
+        finish within `timeout` seconds, with the message (capped at
+        MAX_ERROR_CHARS) in stderr. Other output is drained from the pipe but
+        not kept, so stdout is always None. A timed-out job kills osascript
+        so later jobs are not stuck behind it.
+        """
+        marker = f"shortcuts-mcp-{uuid.uuid4().hex}"
+        job = "\n".join((
+            "try",
+            f'tell application "Shortcuts Events" to run shortcut '
+            f'{_applescript_string(shortcut)} with input '
+            f'{_applescript_string(shortcut_input)}',
+            f'return "{marker}:ok"',
+            "on error errMsg number errNum",
+            f'return "{marker}:err:" & errNum & ":" & errMsg',
+            "end try",
+        ))
+
+        # osascript -i reads one line per statement, so the multi-line
+        # try block is compiled and run through `run script`
+        with self._lock:
+            process = self._ensure_process()
+            try:
+                process.stdin.write(
+                    f'run script {_applescript_string(job)}\n"{marker}:end"\n')
+                process.stdin.flush()
+
+                status = None
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        self._reset(process)
+                        return subprocess.CompletedProcess(
+                            args=["osascript", "-i"],
+                            returncode=1,
+                            stdout=None,
+                            stderr=f"Shortcut did not finish within {timeout:g} seconds",
+                        )
+                    if line is None:
+                        raise RuntimeError("osascript worker exited unexpectedly")
+                    if marker not in line:
+                        continue
+                    sentinel = line[line.index(marker) + len(marker) + 1:]
+                    sentinel = sentinel.rstrip().removesuffix('"')
+                    if sentinel == "end":
+                        break
+                    status = sentinel
+            except Exception:
+                # Leave no half-finished job behind for the next caller
+                self._reset(process)
+                raise
+
+        if status == "ok":
+            return subprocess.CompletedProcess(
+                args=["osascript", "-i"], returncode=0, stdout=None, stderr="")
+
+        if status and status.startswith("err:"):
+            number, _, message = status.removeprefix("err:").partition(":")
+            # Results are printed as AppleScript literals, so undo the escaping
+            message = message.replace('\\"', '"').replace("\\\\", "\\")
+            error = f"{message} ({number})"
+        else:
+            error = "osascript did not report a result for the shortcut"
+        return subprocess.CompletedProcess(
+            args=["osascript", "-i"],
+            returncode=1,
+            stdout=None,
+            stderr=error[:MAX_ERROR_CHARS],
+        )
+
+
+@functools.cache
+def get_shortcuts_worker() -> ShortcutsWorker:
+    """Return the process-wide shortcuts worker."""
+    return ShortcutsWorker()
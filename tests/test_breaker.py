@@ -0,0 +1,98 @@
+"""Tests for the circuit breaker used around the store searches."""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from src.shortcuts_mcp import breaker
+from src.shortcuts_mcp.breaker import CircuitBreaker
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Drive the breaker's clock by hand
+        self.now = 0.0
+        clock = SimpleNamespace(monotonic=lambda: self.now)
+        patch = mock.patch.object(breaker, "time", clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.breaker = CircuitBreaker("Test", fail_max=2, reset_timeout=60)
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+        @self.breaker
+        async def call(ok: bool):
+            self.calls += 1
+            await self.release.wait()
+            if not ok:
+                raise RuntimeError("service down")
+            return "result"
+        self.call = call
+
+    async def open_circuit(self):
+        for _ in range(self.breaker.fail_max):
+            self.assertIsNone(await self.call(False))
+        self.assertTrue(self.breaker.is_open)
+
+    async def test_opens_after_consecutive_failures(self):
+        self.assertIsNone(await self.call(False))
+        self.assertFalse(self.breaker.is_open)
+        await self.open_circuit()
+
+        calls = self.calls
+        self.assertIsNone(await self.call(True))
+        self.assertEqual(self.calls, calls)
+
+    async def test_success_resets_failure_count(self):
+        await self.call(False)
+        self.assertEqual(await self.call(True), "result")
+        await self.call(False)
+        self.assertFalse(self.breaker.is_open)
+
+    async def test_half_open_admits_a_single_trial(self):
+        await self.open_circuit()
+        self.now += 60
+        self.release.clear()
+
+        calls = self.calls
+        trial = asyncio.create_task(self.call(True))
+        await asyncio.sleep(0)
+        # The trial is in flight, so everyone else is still short-circuited
+        self.assertTrue(self.breaker.is_open)
+        self.assertIsNone(await self.call(True))
+        self.assertEqual(self.calls, calls + 1)
+
+        self.release.set()
+        self.assertEqual(await trial, "result")
+        self.assertFalse(self.breaker.is_open)
+
+    async def test_failed_trial_reopens_the_circuit(self):
+        await self.open_circuit()
+        self.now += 60
+
+        self.assertIsNone(await self.call(False))
+        self.assertTrue(self.breaker.is_open)
+        self.now += 59
+        self.assertTrue(self.breaker.is_open)
+        self.now += 1
+        self.assertFalse(self.breaker.is_open)
+
+    async def test_cancelled_trial_frees_the_slot(self):
+        await self.open_circuit()
+        self.now += 60
+        self.release.clear()
+
+        trial = asyncio.create_task(self.call(True))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await trial
+        self.assertFalse(self.breaker.is_open)
+
+
+if __name__ == "__main__":
+    unittest.main()
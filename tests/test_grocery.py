@@ -0,0 +1,88 @@
+"""Tests for the Coles and Woolworths price lookups."""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+import orjson
+from diskcache import Cache
+
+from src.shortcuts_mcp import cache as cache_module
+from src.shortcuts_mcp.tools import grocery
+
+HOMEPAGE = ('<html><script id="__NEXT_DATA__" type="application/json">'
+            '{{"buildId": "{}"}}</script></html>')
+SEARCH_RESULTS = orjson.dumps({"pageProps": {"searchResults": {"results": [
+    {"_type": "PRODUCT", "description": "Bread", "pricing": {"now": 3.0}},
+]}}})
+
+
+class ColesBuildIdTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache = Cache(cache_dir.name)
+        self.addCleanup(self.cache.close)
+        for module in (grocery, cache_module):
+            patch = mock.patch.object(module, "get_cache", return_value=self.cache)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        # The breaker is shared by every GroceryTool; start each test closed
+        grocery._coles_breaker._record_success()
+        self.addCleanup(grocery._coles_breaker._record_success)
+
+        self.requests = []
+        # Build ID advertised on the homepage, and the one Coles serves data for
+        self.homepage_build_id = "new"
+        self.live_build_id = "new"
+        self.tool = grocery.GroceryTool()
+        self.tool.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        self.addAsyncCleanup(self.tool.client.aclose)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        if request.url.path == "/":
+            return httpx.Response(200, text=HOMEPAGE.format(self.homepage_build_id))
+        if f"/{self.live_build_id}/" in request.url.path:
+            return httpx.Response(200, content=SEARCH_RESULTS)
+        # Coles no longer serves data for any other build
+        return httpx.Response(404)
+
+    async def test_stale_build_id_is_replaced_after_404(self):
+        self.cache.set("coles_build_id", "old")
+        self.cache.set("coles_homepage_validators",
+                       {"etag": '"abc"', "last_modified": None, "build_id": "old"})
+
+        product = await self.tool._search_coles("bread")
+
+        self.assertEqual(product["description"], "Bread")
+        self.assertEqual(self.requests, [
+            "/_next/data/old/en/search/products.json",
+            "/",
+            "/_next/data/new/en/search/products.json",
+        ])
+        self.assertEqual(self.cache.get("coles_build_id"), "new")
+        self.assertEqual(self.tool._coles_build_id, "new")
+        # A conditional GET could only have been answered with the stale ID
+        self.assertIsNone(self.cache.get("coles_homepage_validators"))
+
+    async def test_search_is_retried_only_once(self):
+        self.cache.set("coles_build_id", "old")
+        # The homepage still points at a build whose data is gone
+        self.homepage_build_id = "old"
+
+        product = await self.tool._search_coles("bread")
+
+        self.assertIsNone(product)
+        self.assertEqual(self.requests, [
+            "/_next/data/old/en/search/products.json",
+            "/",
+            "/_next/data/old/en/search/products.json",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for the notes and calendar shortcut tools."""
+
+import asyncio
+import subprocess
+import threading
+import unittest
+from unittest import mock
+
+from src.shortcuts_mcp.tools import calendar_tool, notes
+from src.shortcuts_mcp.tools.calendar_tool import CalendarTool
+from src.shortcuts_mcp.tools.notes import NotesTool
+
+
+class BlockingWorker:
+    """Worker whose run() blocks its thread until released, like a slow shortcut."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.jobs = []
+
+    def run(self, shortcut, shortcut_input):
+        self.jobs.append((shortcut, shortcut_input))
+        self.release.wait(timeout=5)
+        return subprocess.CompletedProcess(args=[], returncode=0, stdout=None, stderr="")
+
+
+class ShortcutToolsTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.worker = BlockingWorker()
+        for module in (notes, calendar_tool):
+            patch = mock.patch.object(module, "get_shortcuts_worker", return_value=self.worker)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_running_shortcuts_do_not_block_the_event_loop(self):
+        note = asyncio.create_task(NotesTool().create_note("summary"))
+        event = asyncio.create_task(
+            CalendarTool().create_event("Lunch", "31/05/2025 12:00", "31/05/2025 13:00"))
+
+        # The loop keeps serving other work while both shortcuts are running
+        await asyncio.sleep(0.05)
+        self.assertFalse(note.done() or event.done())
+        self.worker.release.set()
+
+        self.assertEqual(await note, {"status": "success"})
+        self.assertEqual(await event, {"status": "success"})
+        self.assertCountEqual(self.worker.jobs, [
+            ("Claude Notes", "summary"),
+            ("Add New Event", "Lunch, 31/05/2025 12:00, 31/05/2025 13:00"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
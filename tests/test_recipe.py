@@ -0,0 +1,281 @@
+"""Tests for the Gemini request handling in the recipe tool."""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from diskcache import Cache
+from mcp.server.fastmcp import FastMCP
+
+from src.shortcuts_mcp.tools import recipe
+
+
+class RateLimitError(Exception):
+    """Stand-in for a google-genai APIError with HTTP status 429."""
+    code = 429
+
+
+class FakeModels:
+    """Fake aio.models whose first requests fail with a 429, counting concurrency."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.attempts = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def generate_content(self, model, contents, config):
+        self.attempts += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            # Give other requests the chance to start alongside this one
+            await asyncio.sleep(0.01)
+            if self.attempts <= self.failures:
+                raise RateLimitError("429 RESOURCE_EXHAUSTED")
+            return SimpleNamespace(text='[{"name": "egg", "quantity": "2"}]')
+        finally:
+            self.in_flight -= 1
+
+    async def generate_content_stream(self, model, contents, config):
+        # Like the SDK, nothing is sent until the stream is iterated
+        async def stream():
+            self.attempts += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(0.01)
+                if self.attempts <= self.failures:
+                    raise RateLimitError("429 RESOURCE_EXHAUSTED")
+            finally:
+                self.in_flight -= 1
+            yield SimpleNamespace(text='[{"name": "egg", ')
+            yield SimpleNamespace(text='"quantity": "2"}, {"name": "milk", "quantity": "1L"}]')
+        return stream()
+
+
+class GetIngredientsTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache = Cache(cache_dir.name)
+        self.addCleanup(cache.close)
+
+        patches = [
+            mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}),
+            mock.patch.object(recipe, "get_cache", return_value=cache),
+            mock.patch.object(recipe, "_backoff", mock.AsyncMock()),
+            # The semaphore binds to the event loop it is first contended on
+            mock.patch.object(recipe, "_gemini_semaphore",
+                              asyncio.Semaphore(recipe.MAX_CONCURRENT_REQUESTS)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def use_models(self, models: FakeModels) -> None:
+        client = SimpleNamespace(aio=SimpleNamespace(models=models))
+        patch = mock.patch.object(recipe, "_get_client", return_value=client)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def test_rate_limited_request_is_retried(self):
+        models = FakeModels(failures=2)
+        self.use_models(models)
+
+        ingredients = await recipe.RecipeTool().get_ingredients("https://r")
+
+        self.assertEqual(ingredients, [{"name": "egg", "quantity": "2"}])
+        self.assertEqual(models.attempts, 3)
+        self.assertEqual(recipe._backoff.await_count, 2)
+
+    async def test_gives_up_after_max_retries(self):
+        models = FakeModels(failures=recipe.MAX_RETRIES + 1)
+        self.use_models(models)
+
+        with self.assertRaises(RateLimitError):
+            await recipe.RecipeTool().get_ingredients("https://r")
+        self.assertEqual(models.attempts, recipe.MAX_RETRIES + 1)
+
+    async def test_concurrent_requests_are_capped(self):
+        models = FakeModels(failures=0)
+        self.use_models(models)
+        tool = recipe.RecipeTool()
+
+        await asyncio.gather(*(tool.get_ingredients(f"https://r/{i}")
+                               for i in range(recipe.MAX_CONCURRENT_REQUESTS + 5)))
+
+        self.assertEqual(models.attempts, recipe.MAX_CONCURRENT_REQUESTS + 5)
+        self.assertEqual(models.peak_in_flight, recipe.MAX_CONCURRENT_REQUESTS)
+
+    async def test_repeat_url_is_served_from_cache(self):
+        models = FakeModels(failures=0)
+        self.use_models(models)
+        tool = recipe.RecipeTool()
+
+        first = await tool.get_ingredients("https://www.example.com/r/?utm_source=x")
+        second = await tool.get_ingredients("https://example.com/r")
+
+        self.assertEqual(first, second)
+        self.assertEqual(models.attempts, 1)
+
+
+    async def test_local_file_is_not_cached(self):
+        models = FakeModels(failures=0)
+        self.use_models(models)
+        tool = recipe.RecipeTool()
+
+        await tool.get_ingredients("/Users/me/recipes/pie.pdf")
+        await tool.get_ingredients("/Users/me/recipes/pie.pdf")
+
+        self.assertEqual(models.attempts, 2)
+
+
+    async def test_rate_limited_stream_is_retried(self):
+        models = FakeModels(failures=2)
+        self.use_models(models)
+
+        ingredients = [i async for i in recipe.RecipeTool().stream_ingredients("https://r")]
+
+        self.assertEqual(ingredients, [{"name": "egg", "quantity": "2"},
+                                       {"name": "milk", "quantity": "1L"}])
+        self.assertEqual(models.attempts, 3)
+        self.assertEqual(recipe._backoff.await_count, 2)
+
+    async def test_concurrent_streams_are_capped(self):
+        models = FakeModels(failures=0)
+        self.use_models(models)
+        tool = recipe.RecipeTool()
+
+        async def drain(url):
+            return [i async for i in tool.stream_ingredients(url)]
+        await asyncio.gather(*(drain(f"https://r/{i}")
+                               for i in range(recipe.MAX_CONCURRENT_REQUESTS + 5)))
+
+        self.assertEqual(models.peak_in_flight, recipe.MAX_CONCURRENT_REQUESTS)
+
+    async def test_streamed_result_is_shared_with_get_ingredients(self):
+        models = FakeModels(failures=0)
+        self.use_models(models)
+        tool = recipe.RecipeTool()
+
+        streamed = [i async for i in tool.stream_ingredients("https://r")]
+
+        self.assertEqual(await tool.get_ingredients("https://r"), streamed)
+        self.assertEqual(models.attempts, 1)
+
+
+    async def call_get_recipe(self, url):
+        mcp = FastMCP("test")
+        recipe.RecipeTool().register_with_mcp(mcp)
+        content = await mcp.call_tool("get_recipe", {"url": url})
+        # One URL or many, the client gets a single JSON document
+        self.assertEqual(len(content), 1)
+        return json.loads(content[0].text)
+
+    async def test_get_recipe_returns_one_document(self):
+        self.use_models(FakeModels(failures=0))
+
+        self.assertEqual(await self.call_get_recipe("https://r"),
+                         {"ingredients": [{"name": "egg", "quantity": "2"}]})
+
+    async def test_get_recipe_keeps_batched_recipes_apart(self):
+        async def generate_content(model, contents, config):
+            return SimpleNamespace(text=json.dumps([
+                [{"name": "egg", "quantity": "2"}],
+                [{"name": "milk", "quantity": "1L"}, {"name": "flour", "quantity": "200g"}],
+                [],
+            ]))
+        self.use_models(SimpleNamespace(generate_content=generate_content))
+
+        result = await self.call_get_recipe(["https://a", "https://b", "https://c"])
+
+        self.assertEqual(result, {"recipes": [
+            {"url": "https://a", "ingredients": [{"name": "egg", "quantity": "2"}]},
+            {"url": "https://b", "ingredients": [{"name": "milk", "quantity": "1L"},
+                                                 {"name": "flour", "quantity": "200g"}]},
+            {"url": "https://c", "ingredients": []},
+        ]})
+
+
+class InvalidArgumentError(Exception):
+    """Stand-in for a google-genai APIError with HTTP status 400."""
+    code = 400
+
+
+class RequestTooLargeTest(unittest.TestCase):
+
+    def test_input_limit_errors_are_too_large(self):
+        for message in (
+            "400 INVALID_ARGUMENT. The input token count (1200000) exceeds "
+            "the maximum number of tokens allowed (1048576).",
+            "Request payload size exceeds the limit: 20971520 bytes.",
+        ):
+            self.assertTrue(recipe._is_request_too_large(InvalidArgumentError(message)))
+
+    def test_other_invalid_arguments_are_not(self):
+        for message in (
+            "Invalid value for max_output_tokens",
+            "Unable to process input image: file too large for thumbnail",
+        ):
+            self.assertFalse(recipe._is_request_too_large(InvalidArgumentError(message)))
+        self.assertFalse(recipe._is_request_too_large(
+            RateLimitError("input token count exceeds the maximum per minute")))
+
+
+class NormalizeUrlTest(unittest.TestCase):
+
+    def assertSameKey(self, *urls):
+        self.assertEqual(len({recipe._normalize_url(u) for u in urls}), 1, urls)
+
+    def assertDistinctKeys(self, *urls):
+        self.assertEqual(len({recipe._normalize_url(u) for u in urls}), len(urls), urls)
+
+    def test_scheme_host_fragment_and_trailing_slash(self):
+        self.assertSameKey(
+            "https://www.example.com/recipes/pie/",
+            "HTTPS://Example.com/recipes/pie#method",
+            "  https://example.com/recipes/pie  ",
+        )
+
+    def test_tracking_params_dropped_and_query_sorted(self):
+        self.assertSameKey(
+            "https://example.com/r?b=2&a=1",
+            "https://example.com/r?a=1&utm_source=ig&b=2&fbclid=xyz",
+        )
+
+    def test_content_params_kept_on_other_sites(self):
+        self.assertDistinctKeys(
+            "https://example.com/r",
+            "https://example.com/r?ref=vegan",
+            "https://example.com/r?feature=slow-cooker",
+            "https://example.com/r?si=metric",
+        )
+
+    def test_youtube_links_share_one_key(self):
+        self.assertSameKey(
+            "https://www.youtube.com/watch?v=abc123&t=42s",
+            "https://m.youtube.com/watch?feature=share&v=abc123",
+            "https://youtu.be/abc123?si=tracking",
+            "https://youtube.com/shorts/abc123",
+        )
+        self.assertEqual(recipe._normalize_url("https://youtu.be/abc123"),
+                         "https://youtube.com/watch?v=abc123")
+
+    def test_youtube_share_params_dropped_from_other_pages(self):
+        self.assertSameKey(
+            "https://www.youtube.com/playlist?list=PL1&si=tracking",
+            "https://youtube.com/playlist?feature=shared&list=PL1",
+        )
+        self.assertDistinctKeys(
+            "https://youtube.com/watch?v=abc123",
+            "https://youtube.com/watch?v=xyz789",
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Tests for the server's logging setup."""
+
+import logging
+import threading
+import unittest
+
+from src.shortcuts_mcp import server
+
+
+class RecordingHandler(logging.Handler):
+    """Remembers which thread formatted each record and what it was given."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.format_threads = []
+        self.done = threading.Event()
+
+    def format(self, record):
+        self.format_threads.append(threading.current_thread())
+        return super().format(record)
+
+    def emit(self, record):
+        self.format(record)
+        self.records.append(record)
+        self.done.set()
+
+
+class ConfigureLoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        self.addCleanup(setattr, root, "handlers", saved_handlers)
+        self.addCleanup(root.setLevel, saved_level)
+
+        self.handler = RecordingHandler()
+        root.handlers = [self.handler]
+        root.setLevel(logging.INFO)
+        server._configure_logging()
+
+    def test_records_are_formatted_on_the_listener_thread(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test").exception("failed %s", "call")
+
+        self.assertTrue(self.handler.done.wait(timeout=5))
+        record = self.handler.records[0]
+        self.assertEqual(record.getMessage(), "failed call")
+        # Tracebacks survive for handlers that render them (e.g. Rich)
+        self.assertIs(record.exc_info[0], ValueError)
+        self.assertNotIn(threading.current_thread(), self.handler.format_threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
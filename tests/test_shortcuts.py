@@ -0,0 +1,113 @@
+"""Tests for the groceries list shortcut tool."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from src.shortcuts_mcp.tools import shortcuts
+from src.shortcuts_mcp.tools.shortcuts import ShortcutsTool
+
+
+class FakeRecipeTool:
+    """Streams ingredients with a pause between each, like Gemini output."""
+
+    def __init__(self, ingredients, delay=0.0, error=None):
+        self.ingredients = ingredients
+        self.delay = delay
+        self.error = error
+
+    async def stream_ingredients(self, url):
+        for ingredient in self.ingredients:
+            await asyncio.sleep(self.delay)
+            yield ingredient
+        if self.error:
+            raise self.error
+
+
+class ShortcutsToolTest(unittest.IsolatedAsyncioTestCase):
+
+    def make_tool(self, recipe_tool=None) -> ShortcutsTool:
+        tool = ShortcutsTool(recipe_tool)
+        self.runs = []
+
+        async def add_items(items):
+            self.runs.append(items)
+            return {"status": "success", "ingredients_added": items}
+        patch = mock.patch.object(tool, "_add_items", side_effect=add_items)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return tool
+
+    async def test_burst_of_create_list_calls_shares_one_run(self):
+        tool = self.make_tool()
+
+        results = await asyncio.gather(
+            tool.create_list("egg 2"), tool.create_list("milk 1L"), tool.create_list("bread"))
+
+        self.assertEqual(self.runs, ["egg 2, milk 1L, bread"])
+        self.assertEqual([r["ingredients_added"] for r in results],
+                         ["egg 2", "milk 1L", "bread"])
+
+    async def test_calls_after_the_window_get_a_new_run(self):
+        tool = self.make_tool()
+
+        await tool.create_list("egg 2")
+        await tool.create_list("milk 1L")
+
+        self.assertEqual(self.runs, ["egg 2", "milk 1L"])
+
+    async def test_failed_run_is_reported_to_every_caller(self):
+        tool = self.make_tool()
+        failure = {"status": "failed", "message": "Failed to run shortcut: boom"}
+        tool._add_items.side_effect = None
+        tool._add_items.return_value = failure
+
+        results = await asyncio.gather(tool.create_list("egg 2"), tool.create_list("milk 1L"))
+
+        self.assertEqual(results, [failure, failure])
+        self.assertEqual(tool._add_items.await_count, 1)
+
+    async def test_empty_list_skips_the_shortcut(self):
+        tool = self.make_tool()
+
+        result = await tool.create_list("  ")
+
+        self.assertEqual(result, {"status": "success", "ingredients_added": ""})
+        self.assertEqual(self.runs, [])
+
+    async def test_add_recipe_starts_shortcut_while_streaming(self):
+        ingredients = [{"name": "egg", "quantity": "2"},
+                       {"name": "milk", "quantity": "1L"},
+                       {"name": "flour", "quantity": "200g"}]
+        tool = self.make_tool(FakeRecipeTool(
+            ingredients, delay=shortcuts.DEBOUNCE_SECONDS * 3))
+
+        result = await tool.add_recipe_to_list("https://r")
+
+        self.assertEqual(result, {"status": "success",
+                                  "ingredients_added": "egg 2, milk 1L, flour 200g"})
+        # Ingredients far enough apart each get their own shortcut run
+        self.assertEqual(self.runs, ["egg 2", "milk 1L", "flour 200g"])
+
+    async def test_add_recipe_reports_partial_progress_on_error(self):
+        tool = self.make_tool(FakeRecipeTool(
+            [{"name": "egg", "quantity": "2"}], error=RuntimeError("stream dropped")))
+
+        result = await tool.add_recipe_to_list("https://r")
+
+        self.assertEqual(result["status"], "failed")
+        self.assertIn("stream dropped", result["message"])
+        self.assertEqual(result["ingredients_added"], "egg 2")
+        self.assertEqual(self.runs, ["egg 2"])
+
+    async def test_add_recipe_without_ingredients_fails(self):
+        tool = self.make_tool(FakeRecipeTool([]))
+
+        result = await tool.add_recipe_to_list("https://r")
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(self.runs, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Tests for the persistent osascript worker, run against a fake osascript."""
+
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+from src.shortcuts_mcp.worker import ShortcutsWorker
+
+# Answers `run script` jobs like osascript -i would: the shortcut's own
+# output first, then the sentinel the job returns
+FAKE_OSASCRIPT = textwrap.dedent('''\
+    #!{python}
+    import re, sys, time
+    for line in sys.stdin:
+        marker = re.search(r"shortcuts-mcp-[0-9a-f]{{32}}", line).group(0)
+        if not line.startswith("run script"):
+            sys.stdout.write(line)
+        else:
+            sys.stdout.write("fixed the login error\\n")
+            if "hang" in line:
+                time.sleep(30)
+            if "missing" in line:
+                sys.stdout.write('"%s:err:-1728:Can\\'t get shortcut \\\\"missing\\\\""\\n' % marker)
+            else:
+                sys.stdout.write('"%s:ok"\\n' % marker)
+        sys.stdout.flush()
+''')
+
+
+class ShortcutsWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        bin_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(bin_dir.cleanup)
+        path = os.path.join(bin_dir.name, "osascript")
+        with open(path, "w") as f:
+            f.write(FAKE_OSASCRIPT.format(python=sys.executable))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+        patch = mock.patch.dict(os.environ, {"PATH": bin_dir.name + os.pathsep + os.environ["PATH"]})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.worker = ShortcutsWorker()
+        self.addCleanup(lambda: self.worker._process and self.worker._process.kill())
+
+    def test_shortcut_output_mentioning_error_succeeds(self):
+        result = self.worker.run("Claude Notes", "fixed the login error")
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stderr, "")
+
+    def test_error_sentinel_fails_with_message(self):
+        result = self.worker.run("missing", "items")
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stderr, 'Can\'t get shortcut "missing" (-1728)')
+
+    def test_hung_shortcut_times_out_and_worker_recovers(self):
+        result = self.worker.run("Claude Notes", "hang", timeout=0.5)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("did not finish", result.stderr)
+        self.assertIsNone(self.worker._process)
+
+        self.assertEqual(self.worker.run("Claude Notes", "next").returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()